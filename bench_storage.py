@@ -0,0 +1,158 @@
+"""
+저장소 엔진 적합성 검사 + 속도 비교
+    python bench_storage.py            # 모든 엔진
+    python bench_storage.py memory
+ranking_storage의 모든 엔진(STORAGE_ENGINES)에 같은 검사를 돌리고, 통과하면 저장/조회 시간을 나란히 출력
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import ranking_storage
+
+N_SAVES = 2000
+N_QUERIES = 500
+
+
+def make_storage(engine, tmpdir):
+    # 매번 빈 저장소에서 시작
+    if engine == "sqlite":
+        storage = ranking_storage.SQLiteStorage(os.path.join(tempfile.mkdtemp(dir=tmpdir), "ranking.db"))
+    else:
+        storage = ranking_storage.STORAGE_ENGINES[engine]()
+    storage.init()
+    return storage
+
+# -------------------------
+# 적합성 검사 (모든 엔진이 같은 결과를 내야 함)
+# -------------------------
+def check(cond, msg):
+    # assert는 python -O 에서 빠지므로 직접 검사
+    if not cond:
+        raise AssertionError(msg)
+
+
+def check_raises(exc, func, *args, **kwargs):
+    try:
+        func(*args, **kwargs)
+    except exc:
+        return
+    raise AssertionError(f"{func.__name__}: {exc.__name__}가 발생해야 함")
+
+
+def check_conformance(storage):
+    check(isinstance(storage, ranking_storage.RankingStorage), "RankingStorage를 상속해야 함")
+    check(storage.get_ranking("A") == [], "빈 저장소의 순위표는 비어 있어야 함")
+    check(storage.fetch_rows("A") == [], "빈 저장소의 행 목록은 비어 있어야 함")
+    check(storage.get_meta("missing") is None, "없는 meta 키는 None")
+    version = storage.get_version()
+
+    storage.save_score("A", "1", "가", 8, 30.0)
+    storage.save_score("A", "2", "나", 10, 50.0)
+    storage.save_score("A", "3", "다", 10, 40.0)
+    storage.save_score("B", "4", "라", 5, 10.0)
+    storage.save_score("B", "5", "마", 5, 10.0)
+
+    # 저장할 때마다 버전이 올라감 (순위표 폴링용)
+    check(storage.get_version() > version, "저장하면 버전이 올라가야 함")
+    version = storage.get_version()
+    storage.get_ranking("A")
+    check(storage.get_version() == version, "조회만으로 버전이 바뀌면 안 됨")
+
+    # 점수 내림차순, 같은 점수는 시간 오름차순
+    check(storage.get_ranking("A") == [("3", "다", 10, 40.0), ("2", "나", 10, 50.0), ("1", "가", 8, 30.0)], "점수 내림차순, 시간 오름차순")
+    check(storage.get_ranking("A", limit=1) == [("3", "다", 10, 40.0)], "limit 적용")
+    # 점수와 시간이 같으면 먼저 저장한 기록이 앞
+    check(storage.get_ranking("B") == [("4", "라", 5, 10.0), ("5", "마", 5, 10.0)], "동점·동시간이면 먼저 저장한 기록이 앞")
+
+    rows = storage.fetch_rows("A", order_by="id")
+    check(len(rows) == 3 and len(rows[0]) == len(ranking_storage.RANKING_COLUMNS), "fetch_rows는 RANKING_COLUMNS 순서 튜플")
+    ids = [r[0] for r in rows]
+    check(ids == sorted(ids), "order_by='id' 정렬")
+    check([r[5] for r in storage.fetch_rows("A")] == [30.0, 40.0, 50.0], "기본 정렬은 elapsed_time")
+    check([r[0] for r in storage.fetch_rows("A", since_id=ids[0], order_by="id")] == ids[1:], "since_id 이후 행만")
+    # 정렬 기준은 컬럼 이름만 허용
+    check_raises(ValueError, storage.fetch_rows, "A", order_by="score; DROP TABLE ranking")
+
+    storage.set_meta("k", "1")
+    storage.set_meta("k", "2")
+    check(storage.get_meta("k") == "2", "set_meta는 덮어씀")
+
+    # 최근 기록은 정리 대상이 아님
+    storage.maintain()
+    check(len(storage.fetch_rows("A")) == 3, "최근 기록은 정리되면 안 됨")
+    check(storage.get_rollup("A") == [], "최근 기록은 요약되면 안 됨")
+    check(storage.get_version() == version, "정리할 게 없으면 버전 유지")
+
+
+def check_retention(storage):
+    # 보관 기간이 지난 기록 (UTC). 날짜는 한국 시간 기준으로 묶임
+    storage.save_score("A", "1", "가", 3, 10.0, timestamp="2000-01-01 03:00:00")
+    storage.save_score("A", "2", "나", 7, 20.0, timestamp="2000-01-01 05:00:00")
+    storage.save_score("B", "3", "다", 9, 1.0, timestamp="2000-01-01 06:00:00")
+    storage.save_score("A", "4", "라", 5, 60.0, timestamp="2000-01-01 10:00:00")
+    storage.save_score("A", "5", "마", 4, 8.0, timestamp="2000-01-01 20:00:00")    # 한국 시간 1월 2일
+    storage.save_score("A", "6", "바", 10, 5.0)                                     # 최근 기록
+    version = storage.get_version()
+
+    # 배치를 작게 해서 같은 (날짜, 게임)이 여러 배치에 걸쳐 합쳐지는지 확인
+    batch = ranking_storage.ROLLUP_BATCH
+    ranking_storage.ROLLUP_BATCH = 2
+    try:
+        storage.maintain()
+    finally:
+        ranking_storage.ROLLUP_BATCH = batch
+
+    check([r[2] for r in storage.fetch_rows("A", order_by="id")] == ["6"], "오래된 기록은 삭제, 최근 기록은 유지")
+    check(storage.fetch_rows("B") == [], "다른 게임의 오래된 기록도 삭제")
+    rollup = storage.get_rollup("A")
+    check([r[:3] for r in rollup] == [("2000-01-01", 3, 7), ("2000-01-02", 1, 4)], "한국 시간 날짜별 횟수·최고 점수 (배치 간 합산)")
+    check(abs(rollup[0][3] - 30.0) < 1e-9 and abs(rollup[1][3] - 8.0) < 1e-9, "평균 시간 (배치 간 합산)")
+    check([r[:3] for r in storage.get_rollup("B")] == [("2000-01-01", 1, 9)], "게임별로 따로 요약")
+    check(storage.get_version() > version, "기록을 지우면 버전이 올라가야 함")
+
+    # 같은 날 두 번째 실행은 건너뜀
+    version = storage.get_version()
+    storage.maintain()
+    check(storage.get_version() == version, "같은 날 두 번째 정리는 건너뜀")
+
+# -------------------------
+# 속도 측정
+# -------------------------
+def bench(storage):
+    start = time.perf_counter()
+    for i in range(N_SAVES):
+        storage.save_score("bench", str(i), "x", i % 11, float(i % 97))
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(N_QUERIES):
+        storage.get_ranking("bench")
+    query_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(N_QUERIES):
+        storage.get_version()
+    poll_time = time.perf_counter() - start
+    return save_time, query_time, poll_time
+
+
+def main():
+    engines = sys.argv[1:] or list(ranking_storage.STORAGE_ENGINES)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for engine in engines:
+            check_conformance(make_storage(engine, tmpdir))
+            check_retention(make_storage(engine, tmpdir))
+            save_time, query_time, poll_time = bench(make_storage(engine, tmpdir))
+            print(
+                f"{engine:<8} 적합성 OK | "
+                f"저장 {N_SAVES}회 {save_time * 1000:8.1f}ms | "
+                f"조회 {N_QUERIES}회 {query_time * 1000:8.1f}ms | "
+                f"버전 확인 {N_QUERIES}회 {poll_time * 1000:8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
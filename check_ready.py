@@ -0,0 +1,116 @@
+"""
+배포 후 준비 상태 확인 (학생 접속을 받기 전에 실행)
+    streamlit run facequiz.py --server.port 8501 &
+    python check_ready.py facequiz --url http://localhost:8501
+
+1. 서버의 /_stcore/health 가 응답할 때까지 기다림
+2. 첫 세션을 직접 열어서 서버 프로세스 안에서 warm_up()이 돌게 함
+3. warm_up()이 남긴 완료 표시(.warmup_<앱>_<포트>.json)를 기다려 결과 출력
+완료 표시는 서버 포트별로 남으므로, 배포 중 다른 포트에 이전 서버가 떠 있어도 섞이지 않음.
+프록시 뒤라서 URL 포트와 서버 포트가 다르면 --port로 서버 포트를 지정.
+준비되면 0, 워밍업이 실패했거나 문제가 있으면 1, 시간 초과면 2로 종료
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from websockets.sync.client import connect
+
+import ranking_storage
+
+
+def wait_for_health(url, deadline):
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=5) as resp:
+                if resp.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(1)
+    return False
+
+
+def read_marker(app_name, port):
+    try:
+        with open(ranking_storage.warmup_marker_path(app_name, port), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def request_rerun(ws):
+    # 브라우저가 처음 접속할 때처럼 스크립트 실행을 요청
+    msg = BackMsg()
+    msg.rerun_script.SetInParent()
+    ws.send(msg.SerializeToString())
+
+
+def wait_for_marker(app_name, port, ws, since, deadline):
+    while time.time() < deadline:
+        # 서버가 보내는 메시지를 계속 읽어줘야 세션이 막히지 않음
+        try:
+            ws.recv(timeout=0.5)
+        except TimeoutError:
+            pass
+        marker = read_marker(app_name, port)
+        if marker and marker["finished_at"] >= since:
+            return marker
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워밍업 완료 확인")
+    parser.add_argument("app", choices=["facequiz", "science_game"])
+    parser.add_argument("--url", default="http://localhost:8501")
+    parser.add_argument("--port", type=int, help="서버 포트 (생략하면 URL의 포트)")
+    parser.add_argument("--timeout", type=float, default=300, help="초")
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+    port = args.port or urlparse(url).port or 8501
+    deadline = time.time() + args.timeout
+
+    if not wait_for_health(url, deadline):
+        print(f"서버 응답 없음: {url}")
+        sys.exit(2)
+
+    # 이 포트의 서버가 이미 워밍업을 마쳤으면 세션을 열 필요 없음
+    # (포트는 한 프로세스만 쓸 수 있으므로 기록한 pid가 살아 있으면 지금 그 서버)
+    marker = read_marker(args.app, port)
+    if not (marker and marker["ready"] and marker["port"] == port and pid_alive(marker["pid"])):
+        since = time.time()
+        with connect(url.replace("http", "ws", 1) + "/_stcore/stream", subprotocols=["streamlit"]) as ws:
+            request_rerun(ws)
+            marker = wait_for_marker(args.app, port, ws, since, deadline)
+        if marker is None:
+            print("워밍업 시간 초과")
+            sys.exit(2)
+
+    print(f"{args.app} 워밍업 {marker['seconds']:.2f}초 (pid {marker['pid']}, 포트 {marker['port']})")
+    if marker["error"]:
+        print(f"  오류: {marker['error']}")
+    for problem in marker.get("broken", []):
+        print(f"  이미지 오류: {problem}")
+    print("READY" if marker["ready"] else "NOT READY")
+    sys.exit(0 if marker["ready"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+순위 기록 증분 내보내기 (교사용 / 야간 동기화용)
+    python export_ranking.py "화학식 게임" sync/molecule.parquet      # → sync/molecule_3001-3050.parquet
+    python export_ranking.py "눈코입 퀴즈" sync/celebrity.csv --cursor analytics
+    python export_ranking.py "주기율표 게임" out.csv --since 1200     # 커서를 직접 관리
+
+마지막으로 내보낸 id 이후 기록만 파일로 씀. 파일 이름에 id 범위가 붙고 이미 있는 파일은
+덮어쓰지 않으므로, 가져가기 전에 여러 번 실행해도 앞 배치가 사라지지 않음.
+파일을 다 쓰고 난 뒤에만 커서를 옮기므로 중간에 실패하면 다음 실행 때 같은 기록부터 다시 내보냄.
+--since를 주면 저장된 커서는 읽지도 옮기지도 않고, 마지막 id만 출력함.
+"""
+
+import argparse
+import os
+import sys
+
+import ranking_storage
+
+
+def batch_path(out, first_id, last_id):
+    # sync/molecule.parquet → sync/molecule_3001-3050.parquet
+    root, ext = os.path.splitext(out)
+    return f"{root}_{first_id}-{last_id}{ext}"
+
+
+def write_new_file(path, data):
+    # 임시 파일에 끝까지 쓴 뒤 하드 링크로 게시: 같은 이름이 있으면 FileExistsError (덮어쓰지 않음)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.link(tmp_path, path)
+    finally:
+        os.remove(tmp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="순위 기록 증분 내보내기")
+    parser.add_argument("game_type", help='예: "눈코입 퀴즈", "화학식 게임", "주기율표 게임"')
+    parser.add_argument("out", help="출력 파일 (.csv 또는 .parquet), 이름 뒤에 id 범위가 붙음")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="생략하면 확장자로 결정")
+    parser.add_argument("--cursor", default="default", help="커서 이름 (가져가는 쪽마다 따로)")
+    parser.add_argument("--since", type=int, help="이 id 이후만 내보내고 저장된 커서는 건드리지 않음")
+    parser.add_argument("--db", default=ranking_storage.DB_PATH, help="ranking.db 경로")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.out.endswith(".parquet") else "csv")
+    if fmt == "parquet" and ranking_storage.pyarrow is None:
+        sys.exit("Parquet 내보내기에는 pyarrow가 필요합니다: pip install pyarrow")
+
+    storage = ranking_storage.SQLiteStorage(args.db)
+    storage.init()
+    cursor_key = ranking_storage.export_cursor_key(args.game_type, args.cursor)
+    if args.since is not None:
+        since_id = args.since
+    else:
+        since_id = int(storage.get_meta(cursor_key) or 0)
+
+    df_new = ranking_storage.load_export_rows(args.game_type, since_id, order_by="id", storage=storage)
+    if df_new.empty:
+        print(f"{args.game_type}: 새 기록 없음 (id > {since_id})")
+        return
+    last_id = int(df_new['id'].max())
+    out_path = batch_path(args.out, int(df_new['id'].min()), last_id)
+
+    try:
+        write_new_file(out_path, ranking_storage.export_bytes(df_new, fmt))
+    except FileExistsError:
+        sys.exit(f"이미 있는 파일이라 덮어쓰지 않음: {out_path}")
+    if args.since is None:
+        storage.set_meta(cursor_key, str(last_id))
+    print(f"{args.game_type}: {len(df_new)}건 → {out_path} (id {since_id} → {last_id})")
+
+
+if __name__ == "__main__":
+    main()
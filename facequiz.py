@@ -2,25 +2,21 @@ import streamlit as st
 import random
 import time
 import pandas as pd
-import sqlite3
 import os
-import io
-import shutil
+import math
+from array import array
 from PIL import Image
-
-# ------------------------- DB 경로 (영구 저장) -------------------------
-DB_PATH = os.path.join(os.path.dirname(__file__), "ranking.db")
-
-# ------------------------- 자동 백업 -------------------------
-def auto_backup_db():
-    if not os.path.exists(DB_PATH):
-        return
-    backup_dir = os.path.join(os.path.dirname(__file__), "db_backup")
-    os.makedirs(backup_dir, exist_ok=True)
-    today = time.strftime('%Y-%m-%d')
-    backup_filename = os.path.join(backup_dir, f"{today}.db")
-    if not os.path.exists(backup_filename):
-        shutil.copy(DB_PATH, backup_filename)
+from ranking_storage import (
+    auto_backup_db,
+    get_storage,
+    start_db_maintenance,
+    save_score,
+    get_ranking_at,
+    show_ranking,
+    full_csv_bytes,
+    download_csv_by_game,
+    write_warmup_marker,
+)
 
 # ------------------------- 연예인 문제 데이터 -------------------------
 CELEBRITY_IMAGES = [
@@ -41,65 +37,45 @@ CELEBRITY_IMAGES = [
     ("images/sonyaejin.jpg", "손예진")
 ]
 
-# ------------------------- DB 초기화 -------------------------
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS ranking (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            game_type TEXT,
-            student_id TEXT,
-            player_name TEXT,
-            score INTEGER,
-            elapsed_time REAL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-def save_score(game_type, student_id, player_name, score, elapsed_time):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO ranking (game_type, student_id, player_name, score, elapsed_time)
-        VALUES (?, ?, ?, ?, ?)
-    """, (game_type, student_id, player_name, score, elapsed_time))
-    conn.commit()
-    conn.close()
-
-def get_ranking(game_type, limit=10):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT student_id, player_name, score, elapsed_time
-        FROM ranking
-        WHERE game_type=?
-        ORDER BY score DESC, elapsed_time ASC
-        LIMIT ?
-    """, (game_type, limit))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-def download_csv_by_game(game_type, filename):
-    conn = sqlite3.connect(DB_PATH)
-    df_csv = pd.read_sql(
-        f"SELECT * FROM ranking WHERE game_type='{game_type}' ORDER BY elapsed_time ASC",
-        conn
-    )
-    df_csv['timestamp'] = pd.to_datetime(df_csv['timestamp']).dt.tz_localize('UTC').dt.tz_convert('Asia/Seoul')
-    conn.close()
-    csv_buffer = io.BytesIO()
-    df_csv.to_csv(csv_buffer, index=False, encoding="utf-8-sig")
-    csv_buffer.seek(0)
-    st.download_button(
-        label=f"⬇ {game_type} CSV",
-        data=csv_buffer,
-        file_name=filename,
-        mime="text/csv"
+# ------------------------- 워밍업 -------------------------
+@st.cache_resource
+def load_image(image_file):
+    # 앱 폴더 기준 경로로 열고 바로 디코딩까지 해서 캐시 (실행 위치와 무관)
+    image = Image.open(os.path.join(os.path.dirname(__file__), image_file))
+    image.load()
+    return image
+
+@st.cache_resource
+def warm_up():
+    """서버 프로세스당 한 번: 저장소 열기, 이미지 검사/디코딩, 순위표·CSV 캐시 채우기.
+    끝나면 완료 표시 파일을 남김 (check_ready.py가 기다림)."""
+    start = time.perf_counter()
+    questions, broken = [], []
+    try:
+        # 정리(maintain)는 main()의 start_db_maintenance가 별도 스레드에서 함
+        storage = get_storage()
+
+        # 없거나 깨진 이미지는 문제에서 빼고 기록
+        for image_file, answer in CELEBRITY_IMAGES:
+            try:
+                load_image(image_file)
+                questions.append((image_file, answer))
+            except OSError as e:
+                broken.append((image_file, str(e)))
+
+        get_ranking_at("눈코입 퀴즈", storage.get_version())
+        full_csv_bytes("눈코입 퀴즈", storage.get_version())
+    except Exception as e:
+        # 실패는 캐시되지 않으므로 다음 실행 때 다시 시도
+        write_warmup_marker("facequiz", False, time.perf_counter() - start, error=repr(e))
+        raise
+
+    seconds = time.perf_counter() - start
+    write_warmup_marker(
+        "facequiz", not broken, seconds,
+        questions=len(questions), broken=[f"{f} ({e})" for f, e in broken]
     )
+    return {"questions": questions, "broken": broken, "seconds": seconds}
 
 # ------------------------- 세션 초기화 -------------------------
 def init_state():
@@ -113,7 +89,8 @@ def init_state():
         st.session_state.current_question = None
         st.session_state.used_questions = set()
         st.session_state.wrong_answers = []
-        st.session_state.start_time = None
+        st.session_state.question_times = None   # 문항별 풀이 시간(초), 게임 시작 때 할당
+        st.session_state.question_started = None
         st.session_state.elapsed_time = None
         st.session_state.game_over = False
         st.session_state.game_started = False
@@ -129,7 +106,8 @@ def reset_game():
     st.session_state.current_question = None
     st.session_state.used_questions = set()
     st.session_state.wrong_answers = []
-    st.session_state.start_time = None
+    st.session_state.question_times = None
+    st.session_state.question_started = None
     st.session_state.elapsed_time = None
     st.session_state.game_over = False
     st.session_state.game_started = False
@@ -139,10 +117,11 @@ def reset_game():
 
 # ------------------------- 다음 문제 -------------------------
 def next_question():
-    available_pool = [q for q in CELEBRITY_IMAGES if q not in st.session_state.used_questions]
+    questions = warm_up()["questions"]
+    available_pool = [q for q in questions if q not in st.session_state.used_questions]
     if not available_pool:
         st.session_state.used_questions.clear()
-        available_pool = CELEBRITY_IMAGES.copy()
+        available_pool = questions.copy()
 
     image_file, answer = random.choice(available_pool)
     st.session_state.used_questions.add((image_file, answer))
@@ -150,6 +129,8 @@ def next_question():
         "image_file": image_file,
         "correct": answer
     }
+    # 문제가 준비된 시점부터 측정 (time.time()보다 정밀하고 시계 변경에 영향 없음)
+    st.session_state.question_started = time.perf_counter()
 
 # ------------------------- 엔터키 제출 -------------------------
 def process_answer():
@@ -158,6 +139,9 @@ def process_answer():
         return
 
     q = st.session_state.current_question
+    st.session_state.question_times[st.session_state.question_index] = (
+        time.perf_counter() - st.session_state.question_started
+    )
     st.session_state.total += 1
 
     if guess == q["correct"]:
@@ -184,18 +168,15 @@ def main():
     st.set_page_config(page_title="눈코입 퀴즈", layout="wide")
     st.title("👀 눈·코·입만 보고 연예인 맞추기!")
 
-    init_db()
+    report = warm_up()
     auto_backup_db()
+    start_db_maintenance()
     init_state()
 
     # ----------------- 사이드바 -----------------
     with st.sidebar:
         st.header("🏆 순위표")
-        ranking = get_ranking("눈코입 퀴즈")
-        df = pd.DataFrame(ranking, columns=["학번", "이름", "점수", "시간(초)"])
-        df.index = df.index + 1
-        df.index.name = "순위"
-        st.dataframe(df, use_container_width=True)
+        show_ranking("눈코입 퀴즈")
 
         download_csv_by_game("눈코입 퀴즈", "celebrity_ranking.csv")
 
@@ -203,12 +184,17 @@ def main():
             reset_game()
             st.rerun()
 
+    # ----------------- 문제 없음 -----------------
+    if not report["questions"]:
+        st.error("불러올 수 있는 문제 이미지가 없습니다. images 폴더를 확인해주세요.")
+        return
+
     # ----------------- 시작 전 -----------------
     if not st.session_state.game_started:
         st.info("게임 시작 버튼을 눌러주세요.")
         if st.button("게임 시작"):
             st.session_state.game_started = True
-            st.session_state.start_time = time.time()
+            st.session_state.question_times = array("d", [0.0] * st.session_state.questions_to_ask)
             next_question()
             st.rerun()
         return
@@ -216,10 +202,17 @@ def main():
     # ----------------- 게임 종료 -----------------
     if st.session_state.game_over:
         if st.session_state.elapsed_time is None:
-            st.session_state.elapsed_time = time.time() - st.session_state.start_time
+            # 순위에 쓰는 총 시간은 문항별 측정값의 정확한 합
+            st.session_state.elapsed_time = math.fsum(st.session_state.question_times)
 
         st.write(f"🎉 최종 점수: {st.session_state.score}/10")
-        st.write(f"⏱ 걸린 시간: {st.session_state.elapsed_time:.1f}초")
+        st.write(f"⏱ 걸린 시간: {st.session_state.elapsed_time:.3f}초")
+
+        st.subheader("⏱ 문항별 시간")
+        df_times = pd.DataFrame({"시간(초)": [round(t, 3) for t in st.session_state.question_times]})
+        df_times.index = df_times.index + 1
+        df_times.index.name = "문항 번호"
+        st.table(df_times)
 
         if st.session_state.wrong_answers:
             st.subheader("❌ 틀린 문제")
@@ -249,7 +242,7 @@ def main():
     # ----------------- 문제 -----------------
     q = st.session_state.current_question
     st.subheader(f"문제 {st.session_state.question_index + 1} / 10")
-    st.image(Image.open(q["image_file"]), width=300)
+    st.image(load_image(q["image_file"]), width=300)
 
     st.text_input(
         "연예인 이름 입력 후 엔터",
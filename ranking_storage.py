@@ -0,0 +1,467 @@
+"""
+눈코입 퀴즈 / 화학식 게임이 함께 쓰는 순위 저장소 (같은 ranking.db)
+엔진(SQLite/메모리), 자동 백업·정리, 순위표·CSV 내보내기
+"""
+
+import streamlit as st
+import time
+import pandas as pd
+import sqlite3
+import os
+import io
+import json
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+
+# Parquet 내보내기는 pyarrow가 있을 때만 사용
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# ------------------------- DB 경로 (영구 저장) -------------------------
+DB_PATH = os.path.join(os.path.dirname(__file__), "ranking.db")
+
+# ------------------------- 보관 정책 -------------------------
+RETENTION_DAYS = 365        # 이보다 오래된 기록은 일별 요약으로 옮기고 삭제
+BACKUP_KEEP_DAYS = 30       # db_backup 폴더에 남겨둘 백업 개수(일)
+ROLLUP_BATCH = 1000         # 한 트랜잭션에서 정리할 최대 행 수
+VACUUM_PAGES = 500          # 한 번에 반환할 최대 페이지 수
+MAINTENANCE_RETRY_SECONDS = 10 * 60     # 정리 작업이 실패하면 이만큼 뒤에 다시 시도
+
+# ------------------------- 자동 백업 -------------------------
+def auto_backup_db():
+    if not os.path.exists(DB_PATH):
+        return
+    backup_dir = os.path.join(os.path.dirname(__file__), "db_backup")
+    os.makedirs(backup_dir, exist_ok=True)
+    today = time.strftime('%Y-%m-%d')
+    backup_filename = os.path.join(backup_dir, f"{today}.db")
+    if not os.path.exists(backup_filename):
+        # 파일 복사 대신 SQLite 백업 API 사용 (다른 앱의 VACUUM과 겹쳐도 일관된 사본)
+        # 임시 파일에 다 쓴 뒤 이름을 바꿔서 중간에 끊긴 파일이 오늘 백업으로 남지 않게 함
+        tmp_filename = backup_filename + ".tmp"
+        src = sqlite3.connect(DB_PATH, timeout=30)
+        dst = sqlite3.connect(tmp_filename)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+        os.replace(tmp_filename, backup_filename)
+
+        # 새 백업을 만든 날에만 오래된 백업 삭제 (파일명이 날짜라 정렬하면 오래된 순)
+        backups = sorted(f for f in os.listdir(backup_dir) if f.endswith(".db"))
+        for old in backups[:-BACKUP_KEEP_DAYS]:
+            os.remove(os.path.join(backup_dir, old))
+
+# ------------------------- 저장소 (엔진 선택) -------------------------
+# RANKING_STORAGE=memory 로 실행하면 디스크 없이 메모리에만 저장 (테스트/벤치마크용)
+STORAGE_ENGINE = os.environ.get("RANKING_STORAGE", "sqlite")
+
+# 순위표는 이 주기로 버전만 확인하고, 버전이 바뀌었을 때만 다시 조회
+LEADERBOARD_POLL_SECONDS = 5
+
+RANKING_COLUMNS = ["id", "game_type", "student_id", "player_name", "score", "elapsed_time", "timestamp"]
+
+class RankingStorage:
+    """저장소 엔진 인터페이스. 새 엔진은 이 클래스를 상속해 아래 메서드를 모두 구현하고
+    STORAGE_ENGINES에 등록 (bench_storage.py의 적합성 검사를 통과해야 함)."""
+    def init(self):
+        """테이블 등 저장 공간 준비. 여러 번 불러도 안전해야 함."""
+        raise NotImplementedError
+
+    def save_score(self, game_type, student_id, player_name, score, elapsed_time, timestamp=None):
+        """기록 한 건 추가하고 버전을 올림. timestamp는 UTC 'YYYY-MM-DD HH:MM:SS', 없으면 현재 시각."""
+        raise NotImplementedError
+
+    def get_version(self):
+        """ranking이 바뀔 때마다 올라가는 정수."""
+        raise NotImplementedError
+
+    def get_ranking(self, game_type, limit=10):
+        """(학번, 이름, 점수, 시간) 목록. 점수 내림차순, 시간 오름차순, 먼저 저장한 순."""
+        raise NotImplementedError
+
+    def fetch_rows(self, game_type, since_id=0, order_by="elapsed_time"):
+        """id > since_id 인 행을 RANKING_COLUMNS 순서 튜플로. order_by가 컬럼이 아니면 ValueError."""
+        raise NotImplementedError
+
+    def get_rollup(self, game_type):
+        """(날짜, 횟수, 최고 점수, 평균 시간) 목록, 날짜 오름차순."""
+        raise NotImplementedError
+
+    def get_meta(self, key):
+        raise NotImplementedError
+
+    def set_meta(self, key, value):
+        raise NotImplementedError
+
+    def maintain(self):
+        """하루 한 번: 보관 기간이 지난 기록을 요약/삭제. 성공한 뒤에만 오늘 완료로 기록."""
+        raise NotImplementedError
+
+class SQLiteStorage(RankingStorage):
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+
+    def connect(self, **kwargs):
+        return sqlite3.connect(self.db_path, **kwargs)
+
+    def init(self):
+        conn = self.connect()
+        cur = conn.cursor()
+        # 새 DB는 처음부터 incremental 모드로 생성 (기존 DB는 maintain에서 전환)
+        cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ranking (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                game_type TEXT,
+                student_id TEXT,
+                player_name TEXT,
+                score INTEGER,
+                elapsed_time REAL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ranking_rollup (
+                day TEXT,
+                game_type TEXT,
+                attempts INTEGER,
+                best_score INTEGER,
+                mean_time REAL,
+                PRIMARY KEY (day, game_type)
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS db_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def save_score(self, game_type, student_id, player_name, score, elapsed_time, timestamp=None):
+        # timestamp를 안 주면 DB 기본값(CURRENT_TIMESTAMP, UTC)
+        conn = self.connect()
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO ranking (game_type, student_id, player_name, score, elapsed_time, timestamp)
+            VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        """, (game_type, student_id, player_name, score, elapsed_time, timestamp))
+        self.bump_version(cur)
+        conn.commit()
+        conn.close()
+
+    def bump_version(self, cur):
+        # ranking이 바뀔 때마다 같은 트랜잭션 안에서 올림
+        cur.execute("""
+            INSERT INTO db_meta (key, value) VALUES ('ranking_version', 1)
+            ON CONFLICT (key) DO UPDATE SET value = value + 1
+        """)
+
+    def get_version(self):
+        value = self.get_meta("ranking_version")
+        return int(value) if value else 0
+
+    def get_ranking(self, game_type, limit=10):
+        conn = self.connect()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT student_id, player_name, score, elapsed_time
+            FROM ranking
+            WHERE game_type=?
+            ORDER BY score DESC, elapsed_time ASC, id ASC
+            LIMIT ?
+        """, (game_type, limit))
+        rows = cur.fetchall()
+        conn.close()
+        return rows
+
+    def fetch_rows(self, game_type, since_id=0, order_by="elapsed_time"):
+        # order_by는 SQL에 그대로 들어가므로 컬럼 이름만 허용
+        if order_by not in RANKING_COLUMNS:
+            raise ValueError(order_by)
+        conn = self.connect()
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT {', '.join(RANKING_COLUMNS)} FROM ranking WHERE game_type=? AND id>? ORDER BY {order_by} ASC",
+            (game_type, since_id)
+        )
+        rows = cur.fetchall()
+        conn.close()
+        return rows
+
+    def get_rollup(self, game_type):
+        conn = self.connect()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT day, attempts, best_score, mean_time
+            FROM ranking_rollup
+            WHERE game_type=?
+            ORDER BY day
+        """, (game_type,))
+        rows = cur.fetchall()
+        conn.close()
+        return rows
+
+    def get_meta(self, key):
+        conn = self.connect()
+        cur = conn.cursor()
+        cur.execute("SELECT value FROM db_meta WHERE key=?", (key,))
+        row = cur.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        conn = self.connect()
+        cur = conn.cursor()
+        cur.execute("INSERT OR REPLACE INTO db_meta (key, value) VALUES (?, ?)", (key, value))
+        conn.commit()
+        conn.close()
+
+    # ----- 오래된 기록 정리 -----
+    def rollup_old_rows(self, conn):
+        """보관 기간이 지난 기록을 (날짜, 게임) 단위로 요약하고 원본을 삭제. 정리한 행 수 반환."""
+        cutoff = f"-{RETENTION_DAYS} days"
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("""
+            SELECT MAX(id) FROM (
+                SELECT id FROM ranking
+                WHERE timestamp < datetime('now', ?)
+                ORDER BY id
+                LIMIT ?
+            )
+        """, (cutoff, ROLLUP_BATCH))
+        last_id = cur.fetchone()[0]
+        if last_id is None:
+            conn.commit()
+            return 0
+
+        # 날짜는 CSV와 맞춰 한국 시간 기준
+        cur.execute("""
+            INSERT INTO ranking_rollup (day, game_type, attempts, best_score, mean_time)
+            SELECT date(timestamp, '+9 hours'), game_type, COUNT(*), MAX(score), AVG(elapsed_time)
+            FROM ranking
+            WHERE id <= ? AND timestamp < datetime('now', ?)
+            GROUP BY date(timestamp, '+9 hours'), game_type
+            ON CONFLICT (day, game_type) DO UPDATE SET
+                mean_time = (mean_time * attempts + excluded.mean_time * excluded.attempts)
+                            / (attempts + excluded.attempts),
+                attempts = attempts + excluded.attempts,
+                best_score = MAX(best_score, excluded.best_score)
+        """, (last_id, cutoff))
+        cur.execute(
+            "DELETE FROM ranking WHERE id <= ? AND timestamp < datetime('now', ?)",
+            (last_id, cutoff)
+        )
+        deleted = cur.rowcount
+        self.bump_version(cur)
+        conn.commit()
+        return deleted
+
+    def maintain(self):
+        """하루 한 번: 오래된 기록 요약/삭제 후 빈 페이지 반환. 요청 처리와 별도 스레드에서 실행."""
+        today = time.strftime('%Y-%m-%d')
+        # 두 게임 앱이 같은 DB를 쓰므로 오늘 이미 끝났으면 건너뜀
+        if self.get_meta("last_maintenance") == today:
+            return
+
+        conn = self.connect(timeout=30, isolation_level=None)
+        try:
+            cur = conn.cursor()
+            while self.rollup_old_rows(conn) == ROLLUP_BATCH:
+                time.sleep(0.05)    # 배치 사이에 쓰기 요청이 끼어들 수 있게 양보
+
+            # 기존 DB는 한 번만 전체 VACUUM으로 incremental 모드 전환
+            if cur.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                cur.execute("VACUUM")
+            cur.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})").fetchall()
+        finally:
+            conn.close()
+
+        # 모두 성공한 뒤에만 오늘 완료로 기록 (실패하면 다음 시도 때 다시 실행)
+        self.set_meta("last_maintenance", today)
+
+class MemoryStorage(RankingStorage):
+    """SQLiteStorage와 같은 동작을 파이썬 자료구조로 구현. 프로세스가 끝나면 사라짐."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = []          # RANKING_COLUMNS 순서의 튜플, id 오름차순
+        self.rollup = {}        # (day, game_type) -> [attempts, best_score, mean_time]
+        self.meta = {}
+        self.next_id = 1
+        self.version = 0
+
+    def init(self):
+        pass
+
+    def save_score(self, game_type, student_id, player_name, score, elapsed_time, timestamp=None):
+        # timestamp는 SQLite의 CURRENT_TIMESTAMP와 같은 UTC 문자열
+        timestamp = timestamp or time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        with self.lock:
+            self.rows.append((self.next_id, game_type, student_id, player_name, score, elapsed_time, timestamp))
+            self.next_id += 1
+            self.version += 1
+
+    def get_version(self):
+        with self.lock:
+            return self.version
+
+    def get_ranking(self, game_type, limit=10):
+        with self.lock:
+            rows = [r for r in self.rows if r[1] == game_type]
+        rows = heapq.nsmallest(limit, rows, key=lambda r: (-r[4], r[5], r[0]))
+        return [(r[2], r[3], r[4], r[5]) for r in rows]
+
+    def fetch_rows(self, game_type, since_id=0, order_by="elapsed_time"):
+        if order_by not in RANKING_COLUMNS:
+            raise ValueError(order_by)
+        col = RANKING_COLUMNS.index(order_by)
+        with self.lock:
+            rows = [r for r in self.rows if r[1] == game_type and r[0] > since_id]
+        return sorted(rows, key=lambda r: r[col])
+
+    def get_rollup(self, game_type):
+        with self.lock:
+            return sorted(
+                (day, *values) for (day, gt), values in self.rollup.items() if gt == game_type
+            )
+
+    def get_meta(self, key):
+        with self.lock:
+            return self.meta.get(key)
+
+    def set_meta(self, key, value):
+        with self.lock:
+            self.meta[key] = value
+
+    def maintain(self):
+        today = time.strftime('%Y-%m-%d')
+        cutoff = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - RETENTION_DAYS * 86400))
+        with self.lock:
+            if self.meta.get("last_maintenance") == today:
+                return
+            keep = []
+            for r in self.rows:
+                if r[6] >= cutoff:
+                    keep.append(r)
+                    continue
+                day = (datetime.strptime(r[6], '%Y-%m-%d %H:%M:%S') + timedelta(hours=9)).strftime('%Y-%m-%d')
+                entry = self.rollup.setdefault((day, r[1]), [0, r[4], 0.0])
+                entry[2] = (entry[2] * entry[0] + r[5]) / (entry[0] + 1)
+                entry[0] += 1
+                entry[1] = max(entry[1], r[4])
+            if len(keep) != len(self.rows):
+                self.version += 1
+            self.rows = keep
+            self.meta["last_maintenance"] = today
+
+STORAGE_ENGINES = {
+    "sqlite": SQLiteStorage,
+    "memory": MemoryStorage,
+}
+
+@st.cache_resource
+def get_storage(engine=STORAGE_ENGINE):
+    # 프로세스당 한 번만 만들고 초기화 (메모리 엔진은 세션 간 공유)
+    storage = STORAGE_ENGINES[engine]()
+    storage.init()
+    return storage
+
+def run_db_maintenance():
+    try:
+        get_storage().maintain()
+    except Exception:
+        # 데몬 스레드라 여기서 남기지 않으면 실패가 조용히 사라짐
+        logger.exception("ranking DB 정리 실패, %d초 뒤 다시 시도", MAINTENANCE_RETRY_SECONDS)
+        time.sleep(MAINTENANCE_RETRY_SECONDS)
+        start_db_maintenance.clear()    # 다음 실행 때 스레드를 새로 띄움
+
+@st.cache_resource(ttl=24 * 60 * 60)
+def start_db_maintenance():
+    # 프로세스당 하루 한 번만 스레드를 띄움
+    thread = threading.Thread(target=run_db_maintenance, daemon=True)
+    thread.start()
+    return thread
+
+# ------------------------- DB 저장/조회 -------------------------
+def save_score(game_type, student_id, player_name, score, elapsed_time):
+    get_storage().save_score(game_type, student_id, player_name, score, elapsed_time)
+
+def get_ranking(game_type, limit=10):
+    return get_storage().get_ranking(game_type, limit)
+
+@st.cache_data(max_entries=16)
+def get_ranking_at(game_type, version, limit=10):
+    # version이 캐시 키라서 같은 버전이면 모든 세션이 한 번 조회한 결과를 공유
+    return get_ranking(game_type, limit)
+
+@st.fragment(run_every=LEADERBOARD_POLL_SECONDS)
+def show_ranking(game_type):
+    ranking = get_ranking_at(game_type, get_storage().get_version())
+    df = pd.DataFrame(ranking, columns=["학번", "이름", "점수", "시간(초)"])
+    df.index = df.index + 1
+    df.index.name = "순위"
+    st.dataframe(df, use_container_width=True)
+
+def load_export_rows(game_type, since_id=0, order_by="elapsed_time", storage=None):
+    rows = (storage or get_storage()).fetch_rows(game_type, since_id, order_by)
+    df_export = pd.DataFrame(rows, columns=RANKING_COLUMNS)
+    df_export['timestamp'] = pd.to_datetime(df_export['timestamp']).dt.tz_localize('UTC').dt.tz_convert('Asia/Seoul')
+    return df_export
+
+def export_cursor_key(game_type, name="default"):
+    # 내보내기를 가져가는 쪽(name)마다 따로 커서를 둠
+    return f"export_cursor:{name}:{game_type}"
+
+def export_bytes(df_export, fmt="csv"):
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        df_export.to_parquet(buffer, index=False)
+    else:
+        df_export.to_csv(buffer, index=False, encoding="utf-8-sig")
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=16)
+def full_csv_bytes(game_type, version):
+    # 순위 버전이 같으면 모든 세션·재실행이 한 번 만든 CSV를 그대로 씀
+    return export_bytes(load_export_rows(game_type))
+
+def download_csv_by_game(game_type, filename):
+    st.download_button(
+        label=f"⬇ {game_type} CSV",
+        data=full_csv_bytes(game_type, get_storage().get_version()),
+        file_name=filename,
+        mime="text/csv"
+    )
+
+# ------------------------- 워밍업 완료 표시 -------------------------
+def warmup_marker_path(app_name, port):
+    # 서버(포트)마다 따로 기록해서 배포 중 겹쳐 떠 있는 다른 서버의 표시와 섞이지 않게 함
+    return os.path.join(os.path.dirname(__file__), f".warmup_{app_name}_{port}.json")
+
+def write_warmup_marker(app_name, ready, seconds, error=None, **details):
+    """서버 프로세스 안에서 워밍업이 끝나면 기록. check_ready.py가 이 파일을 기다림."""
+    port = st.get_option("server.port")
+    marker = {
+        "pid": os.getpid(),
+        "port": port,
+        "finished_at": time.time(),
+        "ready": ready,
+        "seconds": seconds,
+        "error": error,
+        **details,
+    }
+    path = warmup_marker_path(app_name, port)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(marker, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
@@ -2,27 +2,19 @@ import streamlit as st
 import random
 import time
 import pandas as pd
-import sqlite3
-import os
-import io
-import shutil
-
-# ------------------------- DB 경로 (영구 저장) -------------------------
-DB_PATH = os.path.join(os.path.dirname(__file__), "ranking.db")
-
-# ------------------------- 자동 백업 -------------------------
-def auto_backup_db():
-    # DB 파일이 없으면 백업을 시도하지 않음 (오류 방지)
-    if not os.path.exists(DB_PATH):
-        return
-
-    backup_dir = os.path.join(os.path.dirname(__file__), "db_backup")
-    os.makedirs(backup_dir, exist_ok=True)
-    today = time.strftime('%Y-%m-%d')
-    backup_filename = os.path.join(backup_dir, f"{today}.db")
-    if not os.path.exists(backup_filename):
-        shutil.copy(DB_PATH, backup_filename)
-
+import math
+from array import array
+from ranking_storage import (
+    auto_backup_db,
+    get_storage,
+    start_db_maintenance,
+    save_score,
+    get_ranking_at,
+    show_ranking,
+    full_csv_bytes,
+    download_csv_by_game,
+    write_warmup_marker,
+)
 
 # ------------------------- 데이터 -------------------------
 MOLECULES = [
@@ -43,59 +35,26 @@ PERIODIC = [
     ("S", "황"), ("Cl", "염소"), ("Ar", "아르곤"), ("K", "칼륨"), ("Ca", "칼슘")
 ]
 
-# ------------------------- DB 초기화 -------------------------
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS ranking (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            game_type TEXT,
-            student_id TEXT,
-            player_name TEXT,
-            score INTEGER,
-            elapsed_time REAL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-# ------------------------- DB 저장/조회 -------------------------
-def save_score(game_type, student_id, player_name, score, elapsed_time):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO ranking (game_type, student_id, player_name, score, elapsed_time)
-        VALUES (?, ?, ?, ?, ?)
-    """, (game_type, student_id, player_name, score, elapsed_time))
-    conn.commit()
-    conn.close()
-
-def get_ranking(game_type, limit=10):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT student_id, player_name, score, elapsed_time
-        FROM ranking
-        WHERE game_type=?
-        ORDER BY score DESC, elapsed_time ASC
-        LIMIT ?
-    """, (game_type, limit))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-# ------------------------- CSV 다운로드 -------------------------
-def download_csv_by_game(game_type, filename):
-    conn = sqlite3.connect(DB_PATH)
-    df_csv = pd.read_sql(f"SELECT * FROM ranking WHERE game_type='{game_type}' ORDER BY elapsed_time ASC", conn)
-    df_csv['timestamp'] = pd.to_datetime(df_csv['timestamp']).dt.tz_localize('UTC').dt.tz_convert('Asia/Seoul')
-    conn.close()
-    csv_buffer = io.BytesIO()
-    df_csv.to_csv(csv_buffer, index=False, encoding="utf-8-sig")
-    csv_buffer.seek(0)
-    st.download_button(label=f"⬇ {game_type} CSV", data=csv_buffer, file_name=filename, mime="text/csv")
+# ------------------------- 워밍업 -------------------------
+@st.cache_resource
+def warm_up():
+    """서버 프로세스당 한 번: 저장소 열기, 순위표·CSV 캐시 채우기.
+    끝나면 완료 표시 파일을 남김 (check_ready.py가 기다림)."""
+    start = time.perf_counter()
+    try:
+        # 정리(maintain)는 main()의 start_db_maintenance가 별도 스레드에서 함
+        storage = get_storage()
+        for game_type in ["화학식 게임", "주기율표 게임"]:
+            get_ranking_at(game_type, storage.get_version())
+            full_csv_bytes(game_type, storage.get_version())
+    except Exception as e:
+        # 실패는 캐시되지 않으므로 다음 실행 때 다시 시도
+        write_warmup_marker("science_game", False, time.perf_counter() - start, error=repr(e))
+        raise
+
+    seconds = time.perf_counter() - start
+    write_warmup_marker("science_game", True, seconds)
+    return {"seconds": seconds}
 
 # ------------------------- 문제 생성 -------------------------
 def generate_distractors(correct: str, pool: list, mode: str, n: int=3) -> list:
@@ -115,7 +74,7 @@ def init_state():
         "score":0, "total":0, "streak":0, "question_index":0,
         "questions_to_ask":10, "game_type":"화학식 게임", "mode":"molecule_to_name",
         "current_question":None, "used_questions":set(), "wrong_answers":[],
-        "start_time":None, "elapsed_time":None, "game_over":False, "game_started":False,
+        "question_times":None, "question_started":None, "elapsed_time":None, "game_over":False, "game_started":False,
         "score_saved":False
     }
     for k,v in defaults.items():
@@ -123,7 +82,7 @@ def init_state():
             st.session_state[k]=v
 
 def reset_game():
-    for key in ["score","total","streak","question_index","current_question","used_questions","wrong_answers","start_time","elapsed_time","game_over","game_started","score_saved"]:
+    for key in ["score","total","streak","question_index","current_question","used_questions","wrong_answers","question_times","question_started","elapsed_time","game_over","game_started","score_saved"]:
         if key=="used_questions": st.session_state[key]=set()
         elif key=="wrong_answers": st.session_state[key]=[]
         elif key in ["game_over","game_started","score_saved"]: st.session_state[key]=False
@@ -160,14 +119,17 @@ def next_question():
     options = distractors+[correct]
     random.shuffle(options)
     st.session_state.current_question={"prompt":prompt,"options":options,"correct":correct}
+    # 문제가 준비된 시점부터 측정 (time.time()보다 정밀하고 시계 변경에 영향 없음)
+    st.session_state.question_started=time.perf_counter()
 
 # ------------------------- 메인 -------------------------
 def main():
     st.set_page_config(page_title="화학식/주기율표 게임", layout="wide")
     st.title("🧪 화학식/주기율표 게임")
 
-    init_db()
+    warm_up()
     auto_backup_db()
+    start_db_maintenance()
     init_state()
     disabled_state = st.session_state.game_started
 
@@ -213,18 +175,10 @@ def main():
 
         st.subheader("🏆 순위표")
         st.markdown("**화학식 게임**")
-        ranking1 = get_ranking("화학식 게임")
-        df1 = pd.DataFrame(ranking1, columns=["학번","이름","점수","시간(초)"])
-        df1.index = df1.index + 1
-        df1.index.name = "순위"
-        st.dataframe(df1, use_container_width=True)
+        show_ranking("화학식 게임")
 
         st.markdown("**주기율표 게임**")
-        ranking2 = get_ranking("주기율표 게임")
-        df2 = pd.DataFrame(ranking2, columns=["학번","이름","점수","시간(초)"])
-        df2.index = df2.index + 1
-        df2.index.name = "순위"
-        st.dataframe(df2, use_container_width=True)
+        show_ranking("주기율표 게임")
 
         download_csv_by_game("화학식 게임", "molecule_ranking.csv")
         download_csv_by_game("주기율표 게임", "periodic_ranking.csv")
@@ -233,18 +187,25 @@ def main():
         st.info("설정을 확인 후 '게임 시작' 버튼을 눌러주세요.")
         if st.button("게임 시작"):
             st.session_state.game_started=True
-            st.session_state.start_time=time.time()
+            st.session_state.question_times=array("d",[0.0]*st.session_state.questions_to_ask)
             next_question()
             st.rerun()
         return
 
     if st.session_state.game_over:
         if st.session_state.elapsed_time is None:
-            st.session_state.elapsed_time = time.time() - st.session_state.start_time
+            # 순위에 쓰는 총 시간은 문항별 측정값의 정확한 합
+            st.session_state.elapsed_time = math.fsum(st.session_state.question_times)
 
         st.write(f"📝 게임 종류: {st.session_state.game_type}")
         st.write(f"🎉 최종 점수: {st.session_state.score}/{st.session_state.total}")
-        st.write(f"⏱ 걸린 시간: {st.session_state.elapsed_time:.1f}초")
+        st.write(f"⏱ 걸린 시간: {st.session_state.elapsed_time:.3f}초")
+
+        st.subheader("⏱ 문항별 시간")
+        df_times = pd.DataFrame({"시간(초)": [round(t, 3) for t in st.session_state.question_times]})
+        df_times.index = df_times.index + 1
+        df_times.index.name = "문항 번호"
+        st.table(df_times)
 
         if st.session_state.wrong_answers:
             st.subheader("❌ 틀린 문제 정답")
@@ -291,6 +252,7 @@ def main():
     choice = st.radio("정답 선택:", q["options"], index=None, key=f"choice_{st.session_state.question_index}")
 
     if choice is not None:
+        st.session_state.question_times[st.session_state.question_index] = time.perf_counter() - st.session_state.question_started
         st.session_state.total += 1
         if choice == q["correct"]:
             st.session_state.score += 1